@@ -1,6 +1,13 @@
+import asyncio
 import os
+import re
+from urllib.parse import urlparse
+import uvloop
+from langid.langid import LanguageIdentifier, model as langid_model
+from cachetools import TTLCache
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import (
+    AIORateLimiter,
     ApplicationBuilder,
     CommandHandler,
     MessageHandler,
@@ -8,13 +15,113 @@ from telegram.ext import (
     CallbackQueryHandler,
     filters,
 )
-from googletrans import Translator
+from telegram.request import HTTPXRequest
+from googletrans import LANGUAGES, Translator
 
 # --- CONFIG ---
 TOKEN = os.getenv("BOT_TOKEN")  # set BOT_TOKEN in Railway or replace with your token
-TRIGGER_WORDS = ["wallet", "crypto", "usdt", "sol", "btc", "trx", "money", "withdraw"]
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")  # public https URL; leave unset to use long polling
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")  # required with WEBHOOK_URL; Telegram echoes it on every POST
+PORT = int(os.getenv("PORT", "8443"))
+# Trigger word -> regex for the inflections that still count (wallets, withdrawal, cryptocurrency, ...)
+TRIGGER_WORDS = {
+    "wallet": "s?",
+    "crypto": "(?:s|currenc(?:y|ies))?",
+    "usdt": "s?",
+    "sol": "s?",
+    "btc": "s?",
+    "trx": "s?",
+    "money": "s?",
+    "withdraw": "(?:s|als?|ing|n)?",
+}
+
+# Languages whose support reply is translated ahead of time; others are translated on first use
+SUPPORTED_LANGS = ["en", "es", "fr", "de", "ru", "pt", "zh", "ar", "tr", "id", "vi"]
+# langid codes that googletrans spells differently
+LANG_ALIASES = {"zh": "zh-cn", "jv": "jw", "nb": "no"}
+# Short messages like "btc pls" are guesses; answer those in English
+LANG_MIN_CONFIDENCE = 0.5
 
 translator = Translator()
+# Offline detection over langid's full language set, with normalised confidence scores
+lang_identifier = LanguageIdentifier.from_modelstring(langid_model, norm_probs=True)
+
+SUPPORT_REPLY_EN = (
+    "I noticed you mentioned something about your wallet or crypto. "
+    "Here’s a useful link that might help you: https://help.okx.com\n\n"
+    "If you still need support, you can choose below 👇"
+)
+
+# Static, so built once instead of on every trigger hit
+SUPPORT_KEYBOARD = InlineKeyboardMarkup(
+    [[InlineKeyboardButton("💬 Talk to Support", callback_data="manual_support")]]
+)
+
+
+def trie_pattern(words):
+    """Build a regex alternation from a word -> suffix-pattern mapping, with shared prefixes collapsed into a trie."""
+    trie = {}
+    for word, suffix in words.items():
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = suffix
+
+    def walk(node):
+        if list(node) == [""]:
+            return node[""]
+        alts = [re.escape(ch) + walk(child) for ch, child in sorted(node.items()) if ch]
+        if "" in node:
+            # A word ends here: its suffix is the fallback branch after longer words
+            alts.append(node[""])
+        return alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+
+    return walk(trie)
+
+
+# Compiled once so each message is scanned in a single pass regardless of trigger count.
+# No letter may precede a trigger, but a digit may ("100usdt", "0.5btc").
+TRIGGER_RE = re.compile(
+    rf"(?<![^\W\d_]){trie_pattern(TRIGGER_WORDS)}\b", re.IGNORECASE
+)
+
+
+def detect_lang(text):
+    """Identify the message language locally, without a network round-trip."""
+    lang, confidence = lang_identifier.classify(text)
+    lang = LANG_ALIASES.get(lang, lang)
+    if confidence < LANG_MIN_CONFIDENCE or lang not in LANGUAGES:
+        return "en"
+    return lang
+
+
+# (chat id, user id) pairs already answered in groups; stops repeat replies to chatty users
+RECENTLY_REPLIED = TTLCache(maxsize=10_000, ttl=60 * 60)
+
+# (english text, language) -> translation; bounded and refreshed daily
+TEMPLATE_CACHE = TTLCache(maxsize=4096, ttl=24 * 60 * 60)
+
+
+async def translate_cached(text, dest):
+    """Translate a fixed reply once per target language and reuse it afterwards."""
+    if dest == "en":
+        return text
+    key = (text, dest)
+    if key in TEMPLATE_CACHE:
+        return TEMPLATE_CACHE[key]
+    result = await asyncio.to_thread(translator.translate, text, dest=dest)
+    TEMPLATE_CACHE[key] = result.text
+    return result.text
+
+
+async def prewarm_translations(app):
+    """Translate the support reply for every supported language before serving updates."""
+    # Failures are left for translate_cached to retry lazily on first use
+    await asyncio.gather(
+        *(translate_cached(SUPPORT_REPLY_EN, LANG_ALIASES.get(lang, lang)) for lang in SUPPORTED_LANGS),
+        return_exceptions=True,
+    )
+
 
 # --- START COMMAND ---
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -25,44 +132,92 @@ async def detect_trigger(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not update.message or not update.message.text:
         return
 
-    user_text = update.message.text.lower()
-    user_lang = translator.detect(user_text).lang  # detect language
+    user_text = update.message.text
 
     # Check trigger words
-    if any(word in user_text for word in TRIGGER_WORDS):
+    if TRIGGER_RE.search(user_text):
+        # Throttle repeat replies in groups only; one-on-one support chats always get an answer
+        chat = update.effective_chat
+        user = update.effective_user
+        reply_key = None
+        if chat.type != "private":
+            reply_key = (chat.id, user.id if user else None)
+            if reply_key in RECENTLY_REPLIED:
+                return
+
+        # Only messages that need a reply pay for language detection
+        user_lang = detect_lang(user_text)
+
         # Auto translated response
-        reply_en = (
-            "I noticed you mentioned something about your wallet or crypto. "
-            "Here’s a useful link that might help you: https://help.okx.com\n\n"
-            "If you still need support, you can choose below 👇"
-        )
-        reply_translated = translator.translate(reply_en, dest=user_lang).text
+        reply_translated = await translate_cached(SUPPORT_REPLY_EN, user_lang)
 
-        keyboard = [
-            [InlineKeyboardButton("💬 Talk to Support", callback_data="manual_support")]
-        ]
         await update.message.reply_text(
             reply_translated,
-            reply_markup=InlineKeyboardMarkup(keyboard)
+            reply_markup=SUPPORT_KEYBOARD
         )
+        # Recorded only once the reply went out, so a failed translation or send isn't muted
+        if reply_key is not None:
+            RECENTLY_REPLIED[reply_key] = True
 
 # --- CALLBACK HANDLER ---
 async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
-    await query.answer()
 
     if query.data == "manual_support":
-        await query.message.reply_text("✅ A support agent will join this chat shortly...")
+        # Independent API calls, so let their round-trips overlap
+        await asyncio.gather(
+            query.answer(),
+            query.message.reply_text("✅ A support agent will join this chat shortly..."),
+        )
+    else:
+        await query.answer()
 
 # --- MAIN ---
 def main():
-    app = ApplicationBuilder().token(TOKEN).build()
+    if WEBHOOK_URL and not WEBHOOK_SECRET:
+        raise RuntimeError("WEBHOOK_SECRET must be set when WEBHOOK_URL is used")
+
+    uvloop.install()
+
+    # Queue outbound calls under Telegram's flood limits instead of hitting 429s
+    rate_limiter = AIORateLimiter(
+        overall_max_rate=30,
+        overall_time_period=1,
+        group_max_rate=20,
+        group_time_period=60,
+        max_retries=3,
+    )
+    # Same pool size as PTB's default; multiplexes sends over HTTP/2 and allows slower replies
+    request = HTTPXRequest(
+        connection_pool_size=256,
+        connect_timeout=5.0,
+        read_timeout=20.0,
+        http_version="2",
+    )
+    app = (
+        ApplicationBuilder()
+        .token(TOKEN)
+        .request(request)
+        .rate_limiter(rate_limiter)
+        .post_init(prewarm_translations)
+        .build()
+    )
 
     app.add_handler(CommandHandler("start", start))
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, detect_trigger))
     app.add_handler(CallbackQueryHandler(button_handler))
 
-    app.run_polling()
+    if WEBHOOK_URL:
+        app.run_webhook(
+            listen="0.0.0.0",
+            port=PORT,
+            # Serve on the same path Telegram will POST to
+            url_path=urlparse(WEBHOOK_URL).path.rstrip("/"),
+            webhook_url=WEBHOOK_URL,
+            secret_token=WEBHOOK_SECRET,
+        )
+    else:
+        app.run_polling()
 
 if __name__ == "__main__":
     main()